@@ -1,12 +1,21 @@
 import os
 import time
+import atexit
 import json
 import hmac
-import base64
+import binascii
 import hashlib
 import uuid
+import threading
+from typing import Union
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
 
+import msgspec
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 from flask import Flask, request, jsonify
 
 # -----------------------------------------------------------------------------
@@ -16,121 +25,355 @@ BLOFIN_API_KEY = os.environ.get("BLOFIN_API_KEY")
 BLOFIN_API_SECRET = os.environ.get("BLOFIN_API_SECRET")
 BLOFIN_API_PASSPHRASE = os.environ.get("BLOFIN_API_PASSPHRASE")
 
+# Fail fast on missing credentials. Set REQUIRE_BLOFIN=0 to boot without
+# them (e.g. local Slack-only testing); orders are then refused.
+_BLOFIN_CONFIGURED = bool(
+    BLOFIN_API_KEY and BLOFIN_API_SECRET and BLOFIN_API_PASSPHRASE
+)
+if os.environ.get("REQUIRE_BLOFIN", "1") == "1" and not _BLOFIN_CONFIGURED:
+    raise RuntimeError(
+        "BloFin API credentials are not set in environment variables."
+    )
+
 TRADINGVIEW_WEBHOOK_SECRET = os.environ.get("TRADINGVIEW_WEBHOOK_SECRET", "")
 SLACK_WEBHOOK_URL = os.environ.get("SLACK_WEBHOOK_URL")
+# notify_slack skips all work (including building `extra`) when unset.
+_SLACK_ENABLED = bool(SLACK_WEBHOOK_URL)
+# Pretty-print Slack `extra` blocks (slower); compact JSON by default.
+SLACK_PRETTY = os.environ.get("SLACK_PRETTY") == "1"
+# Set to "0" to stop Slack alerts for malformed (400) webhooks.
+SLACK_NOTIFY_BAD_REQUESTS = (
+    os.environ.get("SLACK_NOTIFY_BAD_REQUESTS", "1") == "1"
+)
+# Token bucket for outgoing Slack posts: sustained rate and burst size.
+# These limits (and SLACK_MAX_PENDING) are per worker process, as is 429
+# backoff: with `-w 2` in the Procfile the effective app-wide rate/queue is
+# twice these values.
+SLACK_RATE_PER_SEC = float(os.environ.get("SLACK_RATE_PER_SEC", "1"))
+SLACK_BURST = float(os.environ.get("SLACK_BURST", "10"))
+# Max Slack messages queued/in flight (per worker) before new ones are dropped.
+SLACK_MAX_PENDING = int(os.environ.get("SLACK_MAX_PENDING", "100"))
+# Seconds between background pings that keep pooled connections warm
+# (0 = warm once at startup only).
+KEEPALIVE_INTERVAL_SEC = float(os.environ.get("KEEPALIVE_INTERVAL_SEC", "240"))
+
+_TV_SECRET_BYTES = TRADINGVIEW_WEBHOOK_SECRET.encode("utf-8")
 
 # BloFin REST base URL (mainnet)
 BLOFIN_BASE_URL = "https://openapi.blofin.com"
 
+# Auth material that never changes over the process lifetime; computed once
+# so the order path doesn't re-encode / rebuild it per request.
+_SECRET_BYTES = (BLOFIN_API_SECRET or "").encode("utf-8")
+_ORDER_PATH = "/api/v1/trade/order"
+_PATH_BYTES = _ORDER_PATH.encode("ascii")
+_METHOD_BYTES = b"POST"
+_BASE_HEADERS = {
+    "ACCESS-KEY": BLOFIN_API_KEY,
+    "ACCESS-PASSPHRASE": BLOFIN_API_PASSPHRASE,
+    "Content-Type": "application/json",
+}
+
 # Flask app
 app = Flask(__name__)
+# TradingView alerts are tiny; reject anything large with a 413 up front.
+app.config["MAX_CONTENT_LENGTH"] = 64 * 1024
+
+# How much of an unparseable body to echo into Slack.
+_RAW_BODY_SNIPPET = 2048
+
+
+# -----------------------------------------------------------------------------
+# HTTP sessions (keep-alive + TLS reuse across webhooks)
+# -----------------------------------------------------------------------------
+def _build_session(retry, base_url):
+    """
+    Build a requests.Session with a pooled adapter so TCP/TLS connections
+    are reused between calls instead of re-handshaking on every POST.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16,
+                          max_retries=retry)
+    session.mount("https://", adapter)
+    session.headers.update({"Content-Type": "application/json"})
+    # Don't re-scan the environment on every request; resolve it once here
+    # for the one host this session talks to. Proxies (HTTPS_PROXY/NO_PROXY)
+    # and the CA bundle (REQUESTS_CA_BUNDLE/CURL_CA_BUNDLE) are honoured;
+    # .netrc is not read (auth goes in explicit headers).
+    session.trust_env = False
+    session.proxies = requests.utils.get_environ_proxies(base_url)
+    session.verify = (os.environ.get("REQUESTS_CA_BUNDLE")
+                      or os.environ.get("CURL_CA_BUNDLE")
+                      or True)
+    return session
+
+
+# Order placement is not idempotent: only retry failures to *connect*, never
+# a read timeout or 5xx after BloFin may already have accepted the order.
+_blofin_session = _build_session(Retry(
+    total=2, connect=2, read=0, status=0, backoff_factor=0.1,
+), BLOFIN_BASE_URL)
+# Slack posts are harmless to repeat, so retry gateway errors too. A 429 is
+# returned straight away (no Retry-After sleep + repost inside urllib3) so
+# send_slack_message can back off via the token bucket instead.
+_slack_session = _build_session(Retry(
+    total=2,
+    backoff_factor=0.1,
+    status_forcelist=(502, 503, 504),
+    allowed_methods=frozenset(["POST"]),
+    respect_retry_after_header=False,
+), SLACK_WEBHOOK_URL or "https://hooks.slack.com")
+
+if not _SLACK_ENABLED:
+    print("Slack webhook URL not configured; Slack notifications disabled.")
+
+atexit.register(_blofin_session.close)
+atexit.register(_slack_session.close)
+
+
+def _warm_connections():
+    """
+    Prime DNS + TLS for BloFin and Slack so the first real order doesn't pay
+    for the handshake, then repeat every KEEPALIVE_INTERVAL_SEC. The Slack
+    ping is a GET on the host root, not the webhook POST, so it only warms
+    DNS/TLS. Any error is just logged.
+    """
+    targets = [(_blofin_session, BLOFIN_BASE_URL + "/api/v1/public/time")]
+    if _SLACK_ENABLED:
+        slack = urlsplit(SLACK_WEBHOOK_URL)
+        targets.append((_slack_session, f"{slack.scheme}://{slack.netloc}/"))
+
+    while True:
+        for session, url in targets:
+            try:
+                session.get(url, timeout=5, allow_redirects=False)
+            except Exception as e:
+                print("Connection warm-up failed:", url, e)
+        if KEEPALIVE_INTERVAL_SEC <= 0:
+            return
+        time.sleep(KEEPALIVE_INTERVAL_SEC)
+
+
+def start_connection_warmer():
+    """
+    Run _warm_connections on a daemon thread. Only called when actually
+    serving (gunicorn `post_worker_init` / local entrypoint), never on import.
+    """
+    threading.Thread(
+        target=_warm_connections, name="warmup", daemon=True
+    ).start()
 
 
 # -----------------------------------------------------------------------------
 # Slack helper
 # -----------------------------------------------------------------------------
+# (last_refill_ts, tokens) – guarded by _slack_bucket_lock.
+_slack_bucket = (time.monotonic(), SLACK_BURST)
+_slack_bucket_lock = threading.Lock()
+
+
+def _slack_take_token():
+    """
+    Refill the Slack token bucket and take one token.
+    Returns False when the caller should drop the message.
+    """
+    global _slack_bucket
+    with _slack_bucket_lock:
+        now = time.monotonic()
+        last, tokens = _slack_bucket
+        tokens = min(SLACK_BURST,
+                     tokens + max(0.0, now - last) * SLACK_RATE_PER_SEC)
+        if tokens < 1:
+            _slack_bucket = (max(now, last), tokens)
+            return False
+        _slack_bucket = (max(now, last), tokens - 1)
+        return True
+
+
+def _slack_backoff(seconds):
+    """
+    Empty the bucket and hold refills for `seconds` (Slack 429 Retry-After).
+    """
+    global _slack_bucket
+    with _slack_bucket_lock:
+        _slack_bucket = (time.monotonic() + seconds, 0.0)
+
+
 def send_slack_message(text, extra=None):
     """
     Send a simple message to Slack via incoming webhook.
     This should never crash the app – failures are swallowed.
     """
-    if not SLACK_WEBHOOK_URL:
-        # No Slack configured; just log and return
-        print("Slack webhook URL not configured.")
+    if not _SLACK_ENABLED:
+        # Only reachable by direct callers; notify_slack already skips.
+        return
+
+    if not _slack_take_token():
+        print("Slack rate limit reached; dropping message:", text)
         return
 
     payload = {"text": text}
 
     if extra is not None:
         try:
-            pretty = json.dumps(extra, indent=2, default=str)
+            if SLACK_PRETTY:
+                pretty = json.dumps(extra, indent=2, default=str)
+            else:
+                pretty = json.dumps(extra, separators=(",", ":"), default=str)
             payload["text"] += f"\n```{pretty}```"
         except Exception:
             # If extra can't be serialized, just ignore
             pass
 
     try:
-        resp = requests.post(SLACK_WEBHOOK_URL, json=payload, timeout=5)
-        if not resp.ok:
+        resp = _slack_session.post(SLACK_WEBHOOK_URL, json=payload, timeout=5,
+                                   allow_redirects=False)
+        if resp.status_code == 429:
+            try:
+                retry_after = float(resp.headers.get("Retry-After", 1))
+            except ValueError:
+                retry_after = 1.0
+            _slack_backoff(retry_after)
+            print("Slack rate limited us; backing off", retry_after, "s")
+        elif not resp.ok:
             print("Slack returned non-200:", resp.status_code, resp.text)
     except Exception as e:
         print("Error sending Slack message:", e)
 
 
+# Slack posts run off the request thread so TradingView gets its response
+# without waiting on Slack round-trips. A single worker keeps messages in
+# submission order (the channel is read as a trade log); Slack is
+# rate-limited to ~1/s anyway.
+_slack_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slack")
+atexit.register(_slack_pool.shutdown, wait=False)
+# Bounds the executor's otherwise unbounded work queue.
+_slack_pending = threading.BoundedSemaphore(SLACK_MAX_PENDING)
+
+
+def notify_slack(text, extra=None):
+    """
+    Queue a Slack message on the background pool (fire-and-forget).
+    send_slack_message swallows its own errors, so the future is ignored.
+    Messages are dropped if SLACK_MAX_PENDING are already queued.
+
+    `extra` may be a dict or a zero-arg callable returning one; the callable
+    is only run when Slack is configured, so callers don't build dicts that
+    would be thrown away.
+    """
+    if not _SLACK_ENABLED:
+        return
+    if callable(extra):
+        extra = extra()
+    if not _slack_pending.acquire(blocking=False):
+        print("Slack queue full; dropping message:", text)
+        return
+    future = _slack_pool.submit(send_slack_message, text, extra)
+    future.add_done_callback(lambda _f: _slack_pending.release())
+
+
 # -----------------------------------------------------------------------------
 # BloFin signing & order helpers
 # -----------------------------------------------------------------------------
-def sign_request(secret, method, path, body=None):
+def sign_request(secret_bytes, method, path, body_bytes=None):
     """
     Generate BloFin API request signature + timestamp + nonce.
 
     prehash string format (according to BloFin docs):
         prehash = path + method + timestamp + nonce + (body_json or "")
     signature = Base64( HMAC_SHA256(secret, prehash).hexdigest().bytes() )
+
+    `secret_bytes` is the already UTF-8 encoded API secret; `method`, `path`
+    and `body_bytes` are bytes as well so the prehash can be joined in one go.
+    `body_bytes` must be exactly what is sent on the wire.
     """
-    timestamp = str(int(time.time() * 1000))
-    nonce = str(uuid.uuid4())
+    timestamp = str(time.time_ns() // 1_000_000)
+    nonce = uuid.uuid4().hex
+
+    parts = [
+        path,
+        method.upper(),
+        timestamp.encode("ascii"),
+        nonce.encode("ascii"),
+    ]
 
-    method = method.upper()
-    message = f"{path}{method}{timestamp}{nonce}"
+    if body_bytes:
+        parts.append(body_bytes)
 
-    if body:
-        body_str = json.dumps(body, separators=(",", ":"))
-        message += body_str
+    message = b"".join(parts)
 
-    hex_sig = hmac.new(
-        secret.encode("utf-8"),
-        message.encode("utf-8"),
-        hashlib.sha256
-    ).hexdigest().encode("utf-8")
+    mac = hmac.new(secret_bytes, message, hashlib.sha256)
 
-    signature = base64.b64encode(hex_sig).decode("utf-8")
+    # BloFin signs the *hex* digest, so hexlify before base64 – both in C.
+    signature = binascii.b2a_base64(
+        binascii.hexlify(mac.digest()), newline=False
+    ).decode("ascii")
 
     return signature, timestamp, nonce
 
 
+# Order body has a fixed shape, so it's formatted directly instead of going
+# through a JSON encoder. Price is omitted for pure market orders.
+_ORDER_BODY_TEMPLATE = (
+    '{"instId":"%s","marginMode":"%s","side":"%s",'
+    '"orderType":"%s","size":"%s"}'
+)
+
+
+def _json_safe(value):
+    """
+    Return `value` as a str that can be dropped into a JSON string literal
+    unescaped. Order fields are plain ASCII like "BTC-USDT-SWAP" / "buy" /
+    "0.5"; anything needing escapes is rejected with a ValueError.
+    """
+    value = str(value)
+    if ('"' in value or "\\" in value
+            or not value.isascii() or not value.isprintable()):
+        raise ValueError(f"Invalid order field value: {value!r}")
+    return value
+
+
 def place_blofin_order(inst_id, side, size,
                        order_type="market", margin_mode="isolated"):
     """
     Place a simple futures order on BloFin.
 
-    NOTE: if BLOFIN_* env vars are not set, this will raise a RuntimeError.
+    NOTE: if BLOFIN_* env vars are not set (only possible with
+    REQUIRE_BLOFIN=0), this will raise a RuntimeError before sending anything.
     """
-    if not (BLOFIN_API_KEY and BLOFIN_API_SECRET and BLOFIN_API_PASSPHRASE):
+    if not _BLOFIN_CONFIGURED:
         raise RuntimeError(
             "BloFin API credentials are not set in environment variables."
         )
 
-    path = "/api/v1/trade/order"
-    url = BLOFIN_BASE_URL + path
+    url = BLOFIN_BASE_URL + _ORDER_PATH
 
-    body = {
-        "instId": inst_id,          # e.g. "BTC-USDT-SWAP"
-        "marginMode": margin_mode,  # "isolated" or "cross"
-        "side": side,               # "buy" or "sell"
-        "orderType": order_type,    # "market" etc.
-        "size": str(size),          # size as string
-        # price can be omitted for pure market orders
-    }
+    body_bytes = (_ORDER_BODY_TEMPLATE % (
+        _json_safe(inst_id),      # e.g. "BTC-USDT-SWAP"
+        _json_safe(margin_mode),  # "isolated" or "cross"
+        _json_safe(side),         # "buy" or "sell"
+        _json_safe(order_type),   # "market" etc.
+        _json_safe(size),         # size as string
+    )).encode("ascii")
 
     signature, timestamp, nonce = sign_request(
-        BLOFIN_API_SECRET, "POST", path, body=body
+        _SECRET_BYTES, _METHOD_BYTES, _PATH_BYTES, body_bytes=body_bytes
     )
 
-    headers = {
-        "ACCESS-KEY": BLOFIN_API_KEY,
+    headers = _BASE_HEADERS.copy()
+    headers.update({
         "ACCESS-SIGN": signature,
         "ACCESS-TIMESTAMP": timestamp,
         "ACCESS-NONCE": nonce,
-        "ACCESS-PASSPHRASE": BLOFIN_API_PASSPHRASE,
-        "Content-Type": "application/json",
-    }
+    })
 
-    resp = requests.post(url, headers=headers, json=body, timeout=10)
+    # Send the exact bytes we signed so the signature always matches.
+    resp = _blofin_session.post(url, headers=headers, data=body_bytes,
+                                timeout=10, allow_redirects=False)
 
     try:
-        data = resp.json()
-    except Exception:
+        data = orjson.loads(resp.content)
+    except orjson.JSONDecodeError:
         data = {"raw_text": resp.text}
 
     if not resp.ok:
@@ -142,9 +385,61 @@ def place_blofin_order(inst_id, side, size,
 # -----------------------------------------------------------------------------
 # Routes
 # -----------------------------------------------------------------------------
+def _body_snippet(raw_body):
+    """Decode at most _RAW_BODY_SNIPPET bytes of a request body for Slack."""
+    snippet = raw_body[:_RAW_BODY_SNIPPET].decode("utf-8", errors="replace")
+    if len(raw_body) > _RAW_BODY_SNIPPET:
+        snippet += "…[truncated]"
+    return snippet
+
+
+class WebhookPayload(msgspec.Struct):
+    """
+    Expected TradingView alert body. Unknown keys are ignored; `secret` and
+    `size` may arrive as a JSON string or number depending on how the alert
+    is written.
+    """
+    secret: Union[str, int] = ""
+    instId: str = ""
+    symbol: str = ""
+    side: str = ""
+    size: Union[str, int, float] = ""
+
+
+_webhook_decoder = msgspec.json.Decoder(WebhookPayload)
+
+
+# Health checks are polled constantly by the platform; serve fixed bytes.
+_HEALTH_BODY = b'{"status":"ok","message":"Trading webhook is running"}'
+_HEALTH_HEADERS = {
+    "Content-Type": "application/json",
+    "Cache-Control": "no-cache",
+}
+
+
 @app.route("/", methods=["GET"])
 def health():
-    return jsonify({"status": "ok", "message": "Trading webhook is running"})
+    return _HEALTH_BODY, 200, _HEALTH_HEADERS
+
+
+def _bad_fields_response(received, error, detail=None):
+    """
+    400 for payloads with missing or wrongly typed fields.
+    Slack is only told when SLACK_NOTIFY_BAD_REQUESTS is on.
+    """
+    if SLACK_NOTIFY_BAD_REQUESTS:
+        notify_slack(
+            f"❌ TradingView webhook rejected: {error}",
+            extra=lambda: {"payload": received, "error": detail}
+        )
+    body = {
+        "ok": False,
+        "error": error,
+        "received": received,
+    }
+    if detail is not None:
+        body["detail"] = detail
+    return jsonify(body), 400
 
 
 @app.route("/webhook", methods=["POST"])
@@ -161,44 +456,71 @@ def tradingview_webhook():
       "size": "1"
     }
     """
-    payload = request.get_json(silent=True)
-    if payload is None:
-        send_slack_message(
-            "❌ TradingView webhook received invalid JSON",
-            extra={"raw_body": request.data.decode(errors="ignore")}
-        )
+    raw_body = request.get_data(cache=False)
+    try:
+        payload = _webhook_decoder.decode(raw_body)
+    except msgspec.ValidationError as e:
+        # Valid JSON, but a field has the wrong type (e.g. "size": null).
+        try:
+            received = orjson.loads(raw_body)
+        except orjson.JSONDecodeError:
+            # e.g. integers orjson can't represent; echo the raw text instead
+            received = _body_snippet(raw_body)
+        return _bad_fields_response(received, "Invalid payload", str(e))
+    except msgspec.DecodeError as e:
+        if SLACK_NOTIFY_BAD_REQUESTS:
+            notify_slack(
+                "❌ TradingView webhook received invalid JSON",
+                extra=lambda: {"raw_body": _body_snippet(raw_body),
+                               "error": str(e)}
+            )
         return jsonify({"ok": False, "error": "Invalid or missing JSON"}), 400
 
-    # 1) Secret validation (if configured)
+    # 1) Extract trading info – malformed payloads are rejected before
+    #    doing any secret work.
+    inst_id = payload.instId or payload.symbol
+    side = payload.side
+    size = payload.size
+
+    if not all((inst_id, side, size)):
+        return _bad_fields_response(
+            msgspec.structs.asdict(payload),
+            "Missing instId/symbol, side, or size in payload",
+        )
+
+    # The order body is formatted without a JSON encoder, so reject values
+    # that would need escaping here rather than as a failed order.
+    try:
+        for value in (inst_id, side, size):
+            _json_safe(value)
+    except ValueError as e:
+        return _bad_fields_response(
+            msgspec.structs.asdict(payload),
+            "Invalid instId/symbol, side, or size in payload",
+            str(e),
+        )
+
+    # 2) Secret validation (if configured)
     if TRADINGVIEW_WEBHOOK_SECRET:
-        incoming_secret = str(payload.get("secret", ""))
-        if incoming_secret != TRADINGVIEW_WEBHOOK_SECRET:
-            send_slack_message(
+        incoming_secret = str(payload.secret)
+        # Constant-time compare so the secret can't be probed byte by byte.
+        if not hmac.compare_digest(incoming_secret.encode("utf-8"),
+                                   _TV_SECRET_BYTES):
+            notify_slack(
                 "❌ Unauthorized TradingView webhook (secret mismatch)",
-                extra={"payload": payload}
+                extra=lambda: {"payload": msgspec.structs.asdict(payload)}
             )
             return jsonify({"ok": False, "error": "Unauthorized"}), 401
 
-    # 2) Extract trading info
-    inst_id = payload.get("instId") or payload.get("symbol")
-    side = payload.get("side")
-    size = payload.get("size")
-
-    if not inst_id or not side or not size:
-        send_slack_message(
-            "❌ TradingView webhook missing required fields",
-            extra={"payload": payload}
-        )
-        return jsonify({
-            "ok": False,
-            "error": "Missing instId/symbol, side, or size in payload",
-            "received": payload,
-        }), 400
-
     # 3) Notify Slack that we got a valid webhook
-    send_slack_message(
+    notify_slack(
         "📩 TradingView webhook received",
-        extra={"instId": inst_id, "side": side, "size": size, "payload": payload}
+        extra=lambda: {
+            "instId": inst_id,
+            "side": side,
+            "size": size,
+            "payload": msgspec.structs.asdict(payload),
+        }
     )
 
     # 4) Try to place BloFin order
@@ -210,9 +532,9 @@ def tradingview_webhook():
         )
     except Exception as e:
         # Report error to Slack but still respond to TradingView
-        send_slack_message(
+        notify_slack(
             "💥 Error placing BloFin order",
-            extra={
+            extra=lambda: {
                 "error": str(e),
                 "instId": inst_id,
                 "side": side,
@@ -222,9 +544,9 @@ def tradingview_webhook():
         return jsonify({"ok": False, "error": str(e)}), 500
 
     # 5) Success → notify Slack
-    send_slack_message(
+    notify_slack(
         "✅ BloFin order placed successfully",
-        extra={
+        extra=lambda: {
             "instId": inst_id,
             "side": side,
             "size": size,
@@ -239,5 +561,12 @@ def tradingview_webhook():
 # Local dev entrypoint
 # -----------------------------------------------------------------------------
 if __name__ == "__main__":
-    # For local testing only. Render will use `gunicorn app:app`.
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    # For local testing only. Production runs under gunicorn (see Procfile):
+    #   gunicorn -k gthread -w 2 --threads 8 --timeout 15 app:app
+    start_connection_warmer()
+    app.run(
+        host="0.0.0.0",
+        port=int(os.environ.get("PORT", 5000)),
+        debug=os.environ.get("FLASK_DEBUG") == "1",
+        threaded=True,
+    )
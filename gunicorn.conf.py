@@ -0,0 +1,8 @@
+# Loaded automatically by gunicorn from the working directory.
+
+
+def post_worker_init(worker):
+    # Warm BloFin/Slack connections in each serving worker (not on import).
+    from app import start_connection_warmer
+
+    start_connection_warmer()
@@ -0,0 +1,8 @@
+import os
+
+# app validates BloFin credentials at import time; give it placeholders and
+# keep Slack off so nothing leaves the process.
+os.environ.setdefault("BLOFIN_API_KEY", "test-key")
+os.environ.setdefault("BLOFIN_API_SECRET", "test-secret")
+os.environ.setdefault("BLOFIN_API_PASSPHRASE", "test-passphrase")
+os.environ.pop("SLACK_WEBHOOK_URL", None)
@@ -0,0 +1,72 @@
+import base64
+import hashlib
+import hmac
+import json
+import uuid
+
+import app
+
+FIXED_NS = 1_700_000_000_123_456_789
+FIXED_UUID = uuid.UUID("12345678-1234-5678-1234-567812345678")
+
+
+class _FakeResponse:
+    ok = True
+    status_code = 200
+    content = b'{"code":"0"}'
+    text = '{"code":"0"}'
+
+
+def _place_order(monkeypatch, **kwargs):
+    sent = {}
+
+    def fake_post(url, headers, data, **_):
+        sent.update(url=url, headers=headers, data=data)
+        return _FakeResponse()
+
+    monkeypatch.setattr(app.time, "time_ns", lambda: FIXED_NS)
+    monkeypatch.setattr(app.uuid, "uuid4", lambda: FIXED_UUID)
+    monkeypatch.setattr(app, "_SECRET_BYTES", b"test-secret")
+    monkeypatch.setattr(app._blofin_session, "post", fake_post)
+    app.place_blofin_order(**kwargs)
+    return sent
+
+
+def test_order_body_matches_json_encoder(monkeypatch):
+    sent = _place_order(monkeypatch, inst_id="BTC-USDT-SWAP",
+                        side="buy", size="0.5")
+
+    expected = json.dumps({
+        "instId": "BTC-USDT-SWAP",
+        "marginMode": "isolated",
+        "side": "buy",
+        "orderType": "market",
+        "size": "0.5",
+    }, separators=(",", ":")).encode("utf-8")
+    assert sent["data"] == expected
+
+
+def test_signature_is_pinned(monkeypatch):
+    sent = _place_order(monkeypatch, inst_id="BTC-USDT-SWAP",
+                        side="buy", size="0.5")
+    headers = sent["headers"]
+
+    timestamp = str(FIXED_NS // 1_000_000)
+    nonce = FIXED_UUID.hex
+    prehash = "/api/v1/trade/orderPOST" + timestamp + nonce + (
+        '{"instId":"BTC-USDT-SWAP","marginMode":"isolated","side":"buy",'
+        '"orderType":"market","size":"0.5"}'
+    )
+    # BloFin's documented form: Base64 of the hex digest.
+    expected = base64.b64encode(hmac.new(
+        b"test-secret", prehash.encode("utf-8"), hashlib.sha256
+    ).hexdigest().encode("utf-8")).decode("utf-8")
+
+    assert headers["ACCESS-TIMESTAMP"] == timestamp
+    assert headers["ACCESS-NONCE"] == nonce
+    assert headers["ACCESS-SIGN"] == expected
+    assert headers["ACCESS-SIGN"] == (
+        "NWM3YWYzYjY3NzI0NDg2M2RmMDdhZDM2MGY5YmVk"
+        "YjVmOTQwNDVkODFkZmJhZGIwMmRkNWZjMTg1M2ExNzBiYg=="
+    )
+
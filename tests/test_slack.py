@@ -0,0 +1,46 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import app
+
+
+class _RateLimitedHandler(BaseHTTPRequestHandler):
+    posts = 0
+
+    def do_POST(self):
+        type(self).posts += 1
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(429)
+        self.send_header("Retry-After", "30")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def test_429_posts_once_and_empties_bucket(monkeypatch):
+    server = HTTPServer(("127.0.0.1", 0), _RateLimitedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        session = app._slack_session
+        # Route plain http through the same retrying adapter as https.
+        monkeypatch.setitem(session.adapters, "http://",
+                            session.get_adapter("https://"))
+        monkeypatch.setattr(app, "_SLACK_ENABLED", True)
+        monkeypatch.setattr(app, "SLACK_WEBHOOK_URL",
+                            "http://127.0.0.1:%d/hook" % server.server_port)
+        monkeypatch.setattr(app, "_slack_bucket",
+                            (time.monotonic(), app.SLACK_BURST))
+
+        started = time.monotonic()
+        app.send_slack_message("hello")
+
+        assert _RateLimitedHandler.posts == 1
+        assert time.monotonic() - started < 1
+        assert app._slack_bucket[1] == 0
+        assert not app._slack_take_token()
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,19 @@
+import app
+
+
+def test_webhook_rejects_fields_needing_escapes(monkeypatch):
+    calls = []
+    monkeypatch.setattr(app._blofin_session, "post",
+                        lambda *a, **k: calls.append((a, k)))
+
+    client = app.app.test_client()
+    resp = client.post("/webhook", json={
+        "secret": app.TRADINGVIEW_WEBHOOK_SECRET,
+        "instId": 'BT"C',
+        "side": "buy",
+        "size": "1",
+    })
+
+    assert resp.status_code == 400
+    assert resp.json["detail"] == "Invalid order field value: 'BT\"C'"
+    assert calls == []